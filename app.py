@@ -1,12 +1,62 @@
 # app.py
+import os
 from flask import Flask, render_template, request, jsonify
-from crawler import search_amazon, search_flipkart, search_myntra, search_meesho
+import crawler
+from crawler import search_amazon, search_flipkart, search_myntra, search_meesho, BrowserPool
+from parsepool import ParsePool
+from precrawler import PreCrawler, normalize
+from recrawl import RecrawlPolicy
+from breaker import CircuitBreaker
 
 app = Flask(__name__)
 
 # Toggle headless for Selenium scrapers here
 HEADLESS = True
 
+# Parse Myntra/Meesho pages in a process pool instead of the request thread
+# (0 = parse inline). Pages beyond PARSE_QUEUE_DEPTH waiting for a free worker
+# are rejected, and a parse taking over PARSE_TIMEOUT s is given up on.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", 0))
+PARSE_QUEUE_DEPTH = 32
+PARSE_TIMEOUT = 30
+if PARSE_WORKERS:
+    crawler.PARSE_POOL = ParsePool(workers=PARSE_WORKERS, queue_depth=PARSE_QUEUE_DEPTH, timeout=PARSE_TIMEOUT)
+
+# Serve Amazon/Flipkart from this many long-lived browsers, one tab per store
+# (0 = start a fresh Chrome for every scrape).
+BROWSER_WORKERS = int(os.environ.get("BROWSER_WORKERS", 0))
+if BROWSER_WORKERS:
+    crawler.BROWSER_POOL = BrowserPool(BROWSER_WORKERS)
+
+SCRAPERS = {"Amazon": search_amazon, "Flipkart": search_flipkart, "Myntra": search_myntra, "Meesho": search_meesho}
+
+# Stop waiting on a store after this many scrapes in a row whose page failed or
+# came back without products, and serve its last good result instead, probing
+# it again every BREAKER_RESET_AFTER s.
+BREAKER_FAILURES = 3
+BREAKER_RESET_AFTER = 60
+breakers = {store: CircuitBreaker(store, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET_AFTER) for store in SCRAPERS}
+
+def scrape(store, product):
+    key = normalize(product)
+    return breakers[store].call(key, lambda: SCRAPERS[store](product, headless=HEADLESS))
+
+def run_scrapers(product):
+    # Run scrapers synchronously (fast for single requests; can be improved later)
+    return [scrape(store, product) for store in SCRAPERS]
+
+# Keep the most requested products pre-crawled in the background
+# (0 store fetches per minute = off). Seeded with the products mock_for knows are hot.
+PRECRAWL_TOP_K = 20
+PRECRAWL_PER_MINUTE = int(os.environ.get("PRECRAWL_PER_MINUTE", 24))
+PRECRAWL_REFRESH_AFTER = 600
+# Recrawl each (product, store) as often as its price actually moves, keeping
+# the chance of serving a changed price under this target (None = fixed interval).
+RECRAWL_STALENESS_TARGET = 0.1
+policy = RecrawlPolicy(target=RECRAWL_STALENESS_TARGET, fixed_interval=PRECRAWL_REFRESH_AFTER) if RECRAWL_STALENESS_TARGET else None
+precrawler = PreCrawler(scrape, SCRAPERS, top_k=PRECRAWL_TOP_K, per_minute=PRECRAWL_PER_MINUTE,
+                        refresh_after=PRECRAWL_REFRESH_AFTER, seed=["iphone 15", "kurti"], policy=policy, breakers=breakers)
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -18,14 +68,13 @@ def compare():
     if not product:
         return jsonify({"error": "No product provided"}), 400
 
-    # Run scrapers synchronously (fast for single requests; can be improved later)
-    results = []
-    a = search_amazon(product, headless=HEADLESS)
-    f = search_flipkart(product, headless=HEADLESS)
-    m = search_myntra(product, headless=HEADLESS)
-    me = search_meesho(product, headless=HEADLESS)
-
-    results = [a, f, m, me]
+    # started here rather than at import so the reloader/parse workers don't crawl too
+    precrawler.start()
+    precrawler.record(product)
+    results = precrawler.get(product)
+    if results is None:
+        results = run_scrapers(product)
+        precrawler.put(product, results)
     # Prepare chart data: keep only those with numeric price
     chart = []
     table = []
@@ -36,5 +85,16 @@ def compare():
 
     return jsonify({"table": table, "chart": chart})
 
+@app.route("/stats")
+def stats():
+    pool = crawler.PARSE_POOL
+    return jsonify({
+        "fetch": crawler.FETCH_STATS,
+        "parse_pool": pool.stats() if pool else None,
+        "precrawler": precrawler.stats(),
+        "breakers": {store: b.stats() for store, b in breakers.items()},
+        "browsers": crawler.BROWSER_POOL.stats() if crawler.BROWSER_POOL else None,
+    })
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,92 @@
+# breaker.py
+# When a store is blocking us or down, every scrape still sits through its
+# WebDriverWait/sleeps/request timeout before returning "Not Available".
+# CircuitBreaker stops calling a store after a run of failures and answers
+# straight away with the last good result for that product, letting one probe
+# through every `reset_after` seconds to see if the store has recovered.
+#
+# Only a scrape whose listing page didn't load (error, timeout, no cards)
+# counts as a failure. Scrapers set result["loaded"] when the page had
+# products, so a store that simply doesn't sell the product isn't penalised.
+# The flag is replaced by result["failed"] on the way out, so callers can tell
+# "not sold here" from "couldn't scrape".
+import time, threading
+from collections import OrderedDict
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+def not_available(store):
+    return {"store": store, "title": "Not Available", "price": None, "url": None}
+
+class CircuitBreaker:
+    def __init__(self, store, failures=3, reset_after=60, keep=500):
+        self.store = store
+        self.failures = failures        # consecutive failed/empty pages before opening
+        self.reset_after = reset_after  # seconds between half-open probes
+        self.state = CLOSED
+        self.failed = 0
+        self.opened_at = 0.0
+        self.last_good = OrderedDict()  # product -> last result with a price
+        self.keep = keep                # most recently good products remembered
+        self.short_circuited = 0
+        self.lock = threading.Lock()
+
+    def fallback(self, product):
+        with self.lock:
+            self.short_circuited += 1
+            good = self.last_good.get(product)
+        result = dict(good) if good else not_available(self.store)
+        result["fallback"] = True
+        return result
+
+    def retry_at(self):
+        """When this store may be called again (0 if the breaker is closed)."""
+        with self.lock:
+            if self.state == CLOSED:
+                return 0.0
+            if self.state == HALF_OPEN:
+                # a probe is in flight; check back after another reset period
+                return time.time() + self.reset_after
+            return self.opened_at + self.reset_after
+
+    def is_open(self):
+        return self.retry_at() > time.time()
+
+    def call(self, product, fetch):
+        """fetch() unless the breaker is open; failed or empty pages count against the store."""
+        with self.lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.reset_after:
+                # let this call through as the probe; others keep getting the fallback
+                self.state = HALF_OPEN
+                probe = True
+            else:
+                probe = False
+            skip = self.state != CLOSED and not probe
+        if skip:
+            return self.fallback(product)
+        try:
+            result = fetch()
+        except Exception:
+            result = None
+        loaded = result.pop("loaded", False) if result else False
+        with self.lock:
+            if result and (loaded or result.get("price") is not None):
+                self.state = CLOSED
+                self.failed = 0
+                if result.get("price") is not None:
+                    self.last_good[product] = result
+                    self.last_good.move_to_end(product)
+                    if len(self.last_good) > self.keep:
+                        self.last_good.popitem(last=False)
+            else:
+                self.failed += 1
+                if probe or self.failed >= self.failures:
+                    self.state = OPEN
+                    self.opened_at = time.time()
+                if result:
+                    result["failed"] = True
+        return result if result else self.fallback(product)
+
+    def stats(self):
+        with self.lock:
+            return {"state": self.state, "failed": self.failed, "short_circuited": self.short_circuited}
@@ -1,5 +1,6 @@
 # crawler.py
-import time, random, re, requests
+import os, time, random, re, json, codecs, queue, atexit, threading, warnings, requests
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -9,6 +10,11 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
@@ -16,9 +22,116 @@ USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; rv:124.0) Gecko/20100101 Firefox/124.0"
 ]
 
+# Store hosts the search pages are fetched from; loadtest.py points these at local stubs
+AMAZON_URL = os.environ.get("AMAZON_URL", "https://www.amazon.in")
+FLIPKART_URL = os.environ.get("FLIPKART_URL", "https://www.flipkart.com")
+MYNTRA_URL = os.environ.get("MYNTRA_URL", "https://www.myntra.com")
+MEESHO_URL = os.environ.get("MEESHO_URL", "https://www.meesho.com")
+
 def get_headers():
     return {"User-Agent": random.choice(USER_AGENTS), "Accept-Language": "en-US,en;q=0.9"}
 
+# ---------- STREAMING FETCH ----------
+# Myntra/Meesho only ever look at the first few cards (or the embedded product
+# JSON), so read the response in chunks and hang up once we have enough.
+STREAM_FETCH = True
+STREAM_CHUNK_SIZE = 16 * 1024
+MAX_CARDS = 12
+# last fetch per store: bytes read, seconds, cards seen, whether we stopped early
+FETCH_STATS = {}
+
+# cards whose end tag HTML lets a page leave out (<li>), and the tags that close them
+OPTIONAL_END = {"li": {"ul", "ol"}}
+
+class ListingWatcher(HTMLParser):
+    """Incremental parser that only tracks product cards and the product JSON blob."""
+    def __init__(self, card_tag, card_classes, max_cards=MAX_CARDS, blob_marker=None):
+        super().__init__(convert_charrefs=False)
+        self.card_tag = card_tag
+        self.card_classes = card_classes
+        self.max_cards = max_cards
+        self.blob_marker = blob_marker
+        self.cards = 0
+        self.depth = 0
+        self.in_blob = False
+        self.blob_done = False
+
+    @property
+    def done(self):
+        return self.cards >= self.max_cards or self.blob_done
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script":
+            # e.g. <script id="__NEXT_DATA__">
+            self.in_blob = bool(self.blob_marker) and any(v == self.blob_marker for _, v in attrs)
+            return
+        if tag != self.card_tag:
+            return
+        is_card = any(c in (dict(attrs).get("class") or "") for c in self.card_classes)
+        if self.depth and is_card and tag in OPTIONAL_END:
+            # <li class="product-base">...<li class="product-base">: the first one ended
+            self.cards += 1
+            self.depth = 1
+        elif self.depth:
+            self.depth += 1
+        elif is_card:
+            self.depth = 1
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            if self.in_blob:
+                self.blob_done = True
+            self.in_blob = False
+            return
+        if tag == self.card_tag and self.depth:
+            self.depth -= 1
+            if not self.depth:
+                self.cards += 1
+        elif self.depth and tag in OPTIONAL_END.get(self.card_tag, ()):
+            # </ul> closes a last <li> that was never closed itself
+            self.cards += 1
+            self.depth = 0
+
+    def handle_data(self, data):
+        # e.g. <script>window.__myx = {...}</script>
+        if self.blob_marker and self.blob_marker in data:
+            self.in_blob = True
+
+    def has_listing(self, html):
+        """Whether html has any product cards or the product JSON at all."""
+        return any(c in html for c in self.card_classes) or bool(self.blob_marker and self.blob_marker in html)
+
+def fetch_listing(url, store, watcher):
+    """Stream url through watcher and return only the HTML read before it was satisfied."""
+    start = time.time()
+    parts = []
+    read = 0
+    with requests.get(url, headers=get_headers(), timeout=10, stream=True) as r:
+        r.raise_for_status()
+        decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+        for chunk in r.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            read += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            watcher.feed(text)
+            if watcher.done:
+                break
+    FETCH_STATS[store] = {
+        "bytes": read,
+        "seconds": round(time.time() - start, 3),
+        "cards": watcher.cards,
+        "blob": watcher.blob_done,
+        "early_stop": watcher.done,
+    }
+    return "".join(parts)
+
+def get_html(url, store, watcher, stream=True):
+    if stream:
+        return fetch_listing(url, store, watcher)
+    r = requests.get(url, headers=get_headers(), timeout=10)
+    r.raise_for_status()
+    return r.text
+
 def create_driver(headless=True):
     options = Options()
     # If you get blocked or no results, set headless=False to see the browser
@@ -34,15 +147,221 @@ def create_driver(headless=True):
     driver.set_window_size(1200, 800)
     return driver
 
+# ---------- SHARED BROWSER ----------
+# Instead of a fresh Chrome per Amazon/Flipkart scrape, a BrowserPool keeps a
+# few long-lived browsers, each serving every store from its own tab. Tabs
+# idle for TAB_IDLE_SECONDS are closed and a browser whose process tree goes
+# over BROWSER_MAX_RSS_MB is restarted. Measuring RSS needs psutil; without it
+# each browser is restarted after BROWSER_MAX_SCRAPES scrapes instead.
+BROWSER_MAX_RSS_MB = 600
+BROWSER_MAX_SCRAPES = 50
+TAB_IDLE_SECONDS = 120
+# give up (and let the breaker count a failure) if no browser frees up in time
+BROWSER_CHECKOUT_TIMEOUT = 30
+# Set to a BrowserPool to use shared browsers instead of one Chrome per scrape.
+BROWSER_POOL = None
+
+class SharedBrowser:
+    def __init__(self, pool, headless=True):
+        self.pool = pool
+        self.headless = headless
+        self.start()
+
+    def start(self):
+        self.driver = create_driver(headless=self.headless)
+        self.base = self.driver.current_window_handle
+        self.tabs = {}  # store -> [window handle, last used]
+        self.rss_before = 0
+        self.scrapes = 0
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+    def restart(self):
+        self.quit()
+        self.pool.record_restart()
+        self.start()
+
+    def rss(self):
+        """Resident memory of chromedriver and every Chrome process under it, or None."""
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            total = 0
+            for p in [root] + root.children(recursive=True):
+                try:
+                    total += p.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total
+        except Exception:
+            return None
+
+    def tab(self, store):
+        self.rss_before = self.rss() or 0
+        entry = self.tabs.get(store)
+        if entry:
+            self.driver.switch_to.window(entry[0])
+        else:
+            self.driver.switch_to.new_window("tab")
+        self.tabs[store] = [self.driver.current_window_handle, time.time()]
+        return self.driver
+
+    def release(self, store):
+        now = time.time()
+        try:
+            self.tabs[store][1] = now
+            for s, (handle, used) in list(self.tabs.items()):
+                if now - used > TAB_IDLE_SECONDS:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                    del self.tabs[s]
+            self.driver.switch_to.window(self.base)
+        except Exception:
+            # the scrape left the browser unusable
+            self.restart()
+            return
+        self.scrapes += 1
+        rss = self.rss()
+        if rss is None:
+            if self.scrapes >= BROWSER_MAX_SCRAPES:
+                self.restart()
+            return
+        self.pool.record_scrape(store, rss, rss - self.rss_before)
+        if rss > BROWSER_MAX_RSS_MB * 2 ** 20:
+            self.restart()
+
+class BrowserPool:
+    def __init__(self, size, checkout_timeout=BROWSER_CHECKOUT_TIMEOUT):
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.idle = queue.Queue()
+        self.browsers = set()
+        self.creating = 0
+        self.leased = {}  # driver -> SharedBrowser
+        self.restarts = 0
+        self.scrapes = {}  # store -> browser RSS after its last scrape and what that scrape added
+        self.lock = threading.Lock()
+        # don't leave Chrome/chromedriver behind on exit or debug-reloader restarts
+        atexit.register(self.shutdown)
+        if psutil is None:
+            warnings.warn(f"psutil is not installed: browser memory can't be measured, so the "
+                          f"{BROWSER_MAX_RSS_MB} MB budget is replaced by a restart every "
+                          f"{BROWSER_MAX_SCRAPES} scrapes (pip install psutil)", RuntimeWarning)
+
+    def checkout(self, headless=True):
+        deadline = time.time() + self.checkout_timeout
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                grow = len(self.browsers) + self.creating < self.size
+                if grow:
+                    self.creating += 1
+            if grow:
+                try:
+                    browser = SharedBrowser(self, headless=headless)
+                finally:
+                    with self.lock:
+                        self.creating -= 1
+                with self.lock:
+                    self.browsers.add(browser)
+                return browser
+            # every browser is busy: wait for one rather than start another
+            left = deadline - time.time()
+            if left <= 0:
+                raise RuntimeError(f"no free browser within {self.checkout_timeout}s")
+            try:
+                return self.idle.get(timeout=min(1.0, left))
+            except queue.Empty:
+                continue
+
+    def discard(self, browser):
+        # the browser is gone; let the next checkout start a new one
+        with self.lock:
+            self.browsers.discard(browser)
+        browser.quit()
+
+    def open(self, store, headless=True):
+        browser = self.checkout(headless=headless)
+        try:
+            driver = browser.tab(store)
+        except Exception:
+            try:
+                browser.restart()
+                self.idle.put(browser)
+            except Exception:
+                self.discard(browser)
+            raise
+        with self.lock:
+            self.leased[driver] = browser
+        return driver
+
+    def close(self, store, driver):
+        with self.lock:
+            browser = self.leased.pop(driver)
+        try:
+            browser.release(store)
+        except Exception:
+            self.discard(browser)
+            return
+        self.idle.put(browser)
+
+    def record_restart(self):
+        with self.lock:
+            self.restarts += 1
+
+    def record_scrape(self, store, rss, delta):
+        with self.lock:
+            self.scrapes[store] = {"rss_mb": round(rss / 2 ** 20, 1), "delta_mb": round(delta / 2 ** 20, 1)}
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.size,
+                "browsers": len(self.browsers),
+                "busy": len(self.leased),
+                "restarts": self.restarts,
+                # how the per-browser memory budget is being enforced
+                "budget": f"rss<={BROWSER_MAX_RSS_MB}MB" if psutil else f"restart every {BROWSER_MAX_SCRAPES} scrapes",
+                "scrapes": {store: dict(v) for store, v in self.scrapes.items()},
+            }
+
+    def shutdown(self):
+        with self.lock:
+            browsers = list(self.browsers)
+            self.browsers.clear()
+        for browser in browsers:
+            browser.quit()
+
+def open_driver(store, headless=True):
+    if BROWSER_POOL is not None:
+        return BROWSER_POOL.open(store, headless=headless)
+    return create_driver(headless=headless)
+
+def close_driver(store, driver):
+    if BROWSER_POOL is not None:
+        BROWSER_POOL.close(store, driver)
+    else:
+        driver.quit()
+
 # ---------- AMAZON ----------
 def search_amazon(product, headless=True):
     data = {"store": "Amazon", "title": "Not Available", "price": None, "url": None}
     driver = None
     try:
-        driver = create_driver(headless=headless)
-        driver.get(f"https://www.amazon.in/s?k={product.replace(' ', '+')}")
+        driver = open_driver("Amazon", headless=headless)
+        driver.get(f"{AMAZON_URL}/s?k={product.replace(' ', '+')}")
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.s-main-slot")))
         products = driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-component-type='s-search-result']")
+        # the listing loaded, even if nothing on it matches (see breaker.py)
+        data["loaded"] = bool(products)
         for p in products[:8]:
             try:
                 title = p.find_element(By.CSS_SELECTOR, "h2 a span").text.strip()
@@ -68,7 +387,7 @@ def search_amazon(product, headless=True):
         pass
     finally:
         if driver:
-            driver.quit()
+            close_driver("Amazon", driver)
     return data
 
 # ---------- FLIPKART ----------
@@ -76,8 +395,8 @@ def search_flipkart(product, headless=True):
     data = {"store": "Flipkart", "title": "Not Available", "price": None, "url": None}
     driver = None
     try:
-        driver = create_driver(headless=headless)
-        driver.get(f"https://www.flipkart.com/search?q={product.replace(' ', '+')}")
+        driver = open_driver("Flipkart", headless=headless)
+        driver.get(f"{FLIPKART_URL}/search?q={product.replace(' ', '+')}")
         # close login popup if present
         time.sleep(random.uniform(1.5, 3))
         try:
@@ -88,6 +407,7 @@ def search_flipkart(product, headless=True):
         time.sleep(random.uniform(1, 2))
         # product cards
         products = driver.find_elements(By.CSS_SELECTOR, "div._1AtVbE")
+        data["loaded"] = bool(products)
         for p in products[:10]:
             try:
                 title_el = p.find_element(By.CSS_SELECTOR, "a.s1Q9rs, a.IRpwTa")
@@ -106,61 +426,117 @@ def search_flipkart(product, headless=True):
         pass
     finally:
         if driver:
-            driver.quit()
+            close_driver("Flipkart", driver)
     return data
 
 # ---------- MYNTRA ----------
-def search_myntra(product, headless=True):
-    data = {"store": "Myntra", "title": "Not Available", "price": None, "url": None}
+def myntra_blob_products(html):
+    """Products from the window.__myx JSON Myntra embeds instead of rendering cards server side."""
+    i = html.find("window.__myx")
+    if i < 0:
+        return []
     try:
-        url = f"https://www.myntra.com/{product.replace(' ', '-')}"
-        r = requests.get(url, headers=get_headers(), timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        product_cards = soup.select("li.product-base")
-        for p in product_cards[:12]:
-            try:
-                brand_el = p.select_one("h3.product-brand")
-                name_el = p.select_one("h4.product-product")
-                price_el = p.select_one("span.product-discountedPrice, span.product-price")
-                if not (brand_el and name_el and price_el):
-                    continue
-                title = f"{brand_el.text.strip()} {name_el.text.strip()}"
-                price_text = re.sub(r"[^\d]", "", price_el.text)
-                price = float(price_text)
-                link = "https://www.myntra.com" + p.select_one("a")["href"]
-                if product.lower() in title.lower() and price > 50:
-                    data.update({"title": title, "price": price, "url": link})
-                    break
-            except:
+        blob, _ = json.JSONDecoder().raw_decode(html[html.index("{", i):])
+        items = blob["searchData"]["results"]["products"]
+    except Exception:
+        return []
+    products = []
+    for it in items[:MAX_CARDS]:
+        try:
+            title = f"{it.get('brand', '')} {it.get('product') or it.get('productName', '')}".strip()
+            link = it.get("landingPageUrl")
+            products.append((title, float(it["price"]), "https://www.myntra.com/" + link.lstrip("/") if link else None))
+        except Exception:
+            continue
+    return products
+
+def parse_myntra(html, product):
+    """Return (title, price, url) for the first matching Myntra product, or None."""
+    soup = BeautifulSoup(html, "html.parser")
+    product_cards = soup.select("li.product-base")
+    for p in product_cards[:MAX_CARDS]:
+        try:
+            brand_el = p.select_one("h3.product-brand")
+            name_el = p.select_one("h4.product-product")
+            price_el = p.select_one("span.product-discountedPrice, span.product-price")
+            if not (brand_el and name_el and price_el):
                 continue
+            title = f"{brand_el.text.strip()} {name_el.text.strip()}"
+            price_text = re.sub(r"[^\d]", "", price_el.text)
+            price = float(price_text)
+            link = "https://www.myntra.com" + p.select_one("a")["href"]
+            if product.lower() in title.lower() and price > 50:
+                return (title, price, link)
+        except:
+            continue
+    for title, price, link in myntra_blob_products(html):
+        if product.lower() in title.lower() and price > 50:
+            return (title, price, link)
+    return None
+
+def search_myntra(product, headless=True, stream=None):
+    data = {"store": "Myntra", "title": "Not Available", "price": None, "url": None}
+    if stream is None:
+        stream = STREAM_FETCH
+    try:
+        url = f"{MYNTRA_URL}/{product.replace(' ', '-')}"
+        watcher = ListingWatcher("li", ["product-base"], blob_marker="window.__myx")
+        html = get_html(url, "Myntra", watcher, stream=stream)
+        found = parse_listing("Myntra", html, product)
+        if found:
+            data.update(zip(("title", "price", "url"), found))
+        # only once parsing worked, so a broken parser/pool still trips the breaker
+        data["loaded"] = watcher.has_listing(html)
     except Exception:
         pass
     return data
 
 # ---------- MEESHO ----------
-def search_meesho(product, headless=True):
+def parse_meesho(html, product):
+    """Return (title, price, url) for the first matching Meesho product, or None."""
+    soup = BeautifulSoup(html, "html.parser")
+    product_cards = soup.select("div.Card__BaseCard, div.sc-dkrFOg")
+    for p in product_cards[:MAX_CARDS]:
+        try:
+            title_el = p.select_one("p") or p.select_one("h3")
+            price_el = p.select_one("h5")
+            if not (title_el and price_el):
+                continue
+            title = title_el.text.strip()
+            price_text = re.sub(r"[^\d]", "", price_el.text)
+            price = float(price_text)
+            a = p.select_one("a")
+            link = "https://www.meesho.com" + a["href"] if a and a.get("href") else None
+            if product.lower() in title.lower() and price > 50:
+                return (title, price, link)
+        except:
+            continue
+    return None
+
+def search_meesho(product, headless=True, stream=None):
     data = {"store": "Meesho", "title": "Not Available", "price": None, "url": None}
+    if stream is None:
+        stream = STREAM_FETCH
     try:
-        url = f"https://www.meesho.com/search?q={product.replace(' ', '%20')}"
-        r = requests.get(url, headers=get_headers(), timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        product_cards = soup.select("div.Card__BaseCard, div.sc-dkrFOg")
-        for p in product_cards[:12]:
-            try:
-                title_el = p.select_one("p") or p.select_one("h3")
-                price_el = p.select_one("h5")
-                if not (title_el and price_el):
-                    continue
-                title = title_el.text.strip()
-                price_text = re.sub(r"[^\d]", "", price_el.text)
-                price = float(price_text)
-                a = p.select_one("a")
-                link = "https://www.meesho.com" + a["href"] if a and a.get("href") else None
-                if product.lower() in title.lower() and price > 50:
-                    data.update({"title": title, "price": price, "url": link})
-                    break
-            except:
-                continue
+        url = f"{MEESHO_URL}/search?q={product.replace(' ', '%20')}"
+        # no blob_marker: parse_meesho reads cards only, and __NEXT_DATA__ comes after them
+        watcher = ListingWatcher("div", ["Card__BaseCard", "sc-dkrFOg"])
+        html = get_html(url, "Meesho", watcher, stream=stream)
+        found = parse_listing("Meesho", html, product)
+        if found:
+            data.update(zip(("title", "price", "url"), found))
+        data["loaded"] = watcher.has_listing(html)
     except Exception:
         pass
     return data
+
+# ---------- PARSING ----------
+PARSERS = {"Myntra": parse_myntra, "Meesho": parse_meesho}
+# Set to a parsepool.ParsePool to run BeautifulSoup in worker processes
+# instead of the calling (Flask request) thread.
+PARSE_POOL = None
+
+def parse_listing(store, html, product):
+    if PARSE_POOL is not None:
+        return PARSE_POOL.parse(PARSERS[store], html, product)
+    return PARSERS[store](html, product)
@@ -0,0 +1,274 @@
+# loadtest.py
+# Load-test harness for the /compare service. Starts local stub versions of
+# Amazon/Flipkart/Myntra/Meesho (configurable latency, failure rate and page
+# size), runs app.py against them, and drives /compare at stepped concurrency
+# levels. Per step it reports latency percentiles, throughput, error rate, the
+# share of store results the circuit breakers answered with a fallback, and the
+# peak RSS / Chrome process count of the app's process tree.
+#
+#   python loadtest.py --levels 1,2,4,8 --duration 30 --latency 0.3 --failure-rate 0.05
+#   python loadtest.py --browser-workers 2 --parse-workers 4   # same load, pooled
+import os, sys, json, math, time, random, argparse, threading, subprocess
+import urllib.request, urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PRODUCTS = ["iphone 15", "kurti", "running shoes", "backpack", "smart watch", "saree", "earbuds", "jeans"]
+
+# ---------- STUB STORES ----------
+def amazon_page(q, cards):
+    items = "".join(
+        f'<div data-component-type="s-search-result"><h2><a href="/dp/{i}"><span>{q} item {i}</span></a></h2>'
+        f'<span class="a-price-whole">{999 + i}</span><span class="a-price-fraction">00</span></div>'
+        for i in range(cards))
+    return f'<html><body><div class="s-main-slot">{items}</div></body></html>'
+
+def flipkart_page(q, cards):
+    items = "".join(
+        f'<div class="_1AtVbE"><a class="s1Q9rs" href="/p/{i}">{q} item {i}</a><div class="_30jeq3">₹{899 + i}</div></div>'
+        for i in range(cards))
+    return f'<html><body>{items}</body></html>'
+
+def myntra_page(q, cards):
+    items = "".join(
+        f'<li class="product-base"><a href="/p/{i}"><h3 class="product-brand">Stub</h3>'
+        f'<h4 class="product-product">{q} item {i}</h4><span class="product-discountedPrice">Rs. {799 + i}</span></a></li>'
+        for i in range(cards))
+    return f'<html><body><ul>{items}</ul></body></html>'
+
+def meesho_page(q, cards):
+    items = "".join(
+        f'<div class="sc-dkrFOg"><a href="/p/{i}"><p>{q} item {i}</p><h5>₹{499 + i}</h5></a></div>'
+        for i in range(cards))
+    return f'<html><body>{items}</body></html>'
+
+STUBS = {
+    "AMAZON_URL": (amazon_page, lambda path, query: query.get("k", [""])[0]),
+    "FLIPKART_URL": (flipkart_page, lambda path, query: query.get("q", [""])[0]),
+    "MYNTRA_URL": (myntra_page, lambda path, query: path.strip("/").replace("-", " ")),
+    "MEESHO_URL": (meesho_page, lambda path, query: query.get("q", [""])[0]),
+}
+
+def stub_handler(render, get_query, args):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(args.latency * random.uniform(0.5, 1.5))
+            if random.random() < args.failure_rate:
+                self.send_error(503)
+                return
+            url = urllib.parse.urlsplit(self.path)
+            q = get_query(urllib.parse.unquote(url.path), urllib.parse.parse_qs(url.query))
+            body = (render(q, args.cards) + "<!--" + "x" * (args.pad_kb * 1024) + "-->").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # streaming fetches hang up once they have enough cards
+                pass
+
+        def log_message(self, *a):
+            pass
+    return Handler
+
+def start_stubs(args):
+    env = {}
+    for name, (render, get_query) in STUBS.items():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), stub_handler(render, get_query, args))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        env[name] = f"http://127.0.0.1:{server.server_address[1]}"
+    return env
+
+# ---------- APP UNDER TEST ----------
+# app.py imports the scrapers as `crawler`
+APP_BOOT = (
+    "import sys, importlib; sys.modules['crawler'] = importlib.import_module('finalCrawler'); "
+    "import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"
+)
+
+def start_app(args, stub_env):
+    env = dict(os.environ, **stub_env)
+    if args.unique:
+        # every product is new, so pre-crawling them would only add load
+        env["PRECRAWL_PER_MINUTE"] = "0"
+    env["BROWSER_WORKERS"] = str(args.browser_workers)
+    env["PARSE_WORKERS"] = str(args.parse_workers)
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen([sys.executable, "-c", APP_BOOT.format(port=args.port)], cwd=here, env=env,
+                            stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("app exited during startup (run with --verbose to see why)")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{args.port}/stats", timeout=2)
+            return proc
+        except Exception:
+            time.sleep(0.5)
+    proc.kill()
+    raise SystemExit("app did not come up within 30s")
+
+def short_circuited(args):
+    """Total store calls the app's circuit breakers have answered without scraping."""
+    with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/stats", timeout=10) as r:
+        breakers = json.load(r)["breakers"]
+    return sum(b["short_circuited"] for b in breakers.values()), len(breakers)
+
+class Monitor:
+    """Samples RSS and Chrome process count across the app's process tree."""
+    def __init__(self, pid, every=0.25):
+        self.proc = psutil.Process(pid) if psutil else None
+        self.every = every
+        self.peak_rss = 0
+        self.peak_chrome = 0
+        self.stopped = threading.Event()
+
+    def sample(self):
+        rss = 0
+        chrome = 0
+        for p in [self.proc] + self.proc.children(recursive=True):
+            try:
+                rss += p.memory_info().rss
+                name = p.name().lower()
+                if "chrome" in name and "chromedriver" not in name:
+                    chrome += 1
+            except psutil.Error:
+                continue
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_chrome = max(self.peak_chrome, chrome)
+
+    def run(self):
+        while not self.stopped.wait(self.every):
+            try:
+                self.sample()
+            except psutil.Error:
+                return
+
+    def __enter__(self):
+        if self.proc:
+            threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+
+# ---------- LOAD ----------
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(pct / 100.0 * len(values)) - 1)]
+
+def run_step(args, level, counter):
+    url = f"http://127.0.0.1:{args.port}/compare"
+    deadline = time.time() + args.duration
+    latencies = []
+    errors = 0
+    empty = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors, empty
+        while time.time() < deadline:
+            product = random.choice(PRODUCTS)
+            if args.unique:
+                # defeat the pre-crawl cache so every request scrapes
+                with lock:
+                    counter[0] += 1
+                    product = f"{product} {counter[0]}"
+            req = urllib.request.Request(url, data=json.dumps({"product": product}).encode(),
+                                         headers={"Content-Type": "application/json"})
+            start = time.time()
+            try:
+                with urllib.request.urlopen(req, timeout=args.timeout) as r:
+                    body = json.load(r)
+                ok = True
+            except Exception:
+                ok = False
+            took = time.time() - start
+            with lock:
+                if ok:
+                    latencies.append(took)
+                    if not body.get("chart"):
+                        empty += 1
+                else:
+                    errors += 1
+
+    fallbacks_before, stores = short_circuited(args)
+    started = time.time()
+    with Monitor(args.app_pid) as mon:
+        threads = [threading.Thread(target=worker) for _ in range(level)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.time() - started
+    done = len(latencies) + errors
+    # scrapers swallow their own errors, so store failures show up here rather than in error_rate
+    fallbacks = short_circuited(args)[0] - fallbacks_before
+    return {
+        "concurrency": level,
+        "requests": done,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput": done / elapsed if elapsed else 0.0,
+        "error_rate": errors / done if done else 0.0,
+        "empty_rate": empty / len(latencies) if latencies else 0.0,
+        "fallback_rate": fallbacks / (len(latencies) * stores) if latencies else 0.0,
+        "peak_rss_mb": mon.peak_rss / 2 ** 20 if mon.proc else None,
+        "peak_chrome": mon.peak_chrome if mon.proc else None,
+    }
+
+def fmt(v, spec):
+    return format("-", ">" + spec.split(".")[0].rstrip("dfs")) if v is None else format(v, spec)
+
+def print_row(s):
+    print(f"{s['concurrency']:>5} {s['requests']:>6} {fmt(s['p50'], '7.2f')} {fmt(s['p95'], '7.2f')} {fmt(s['p99'], '7.2f')} "
+          f"{s['throughput']:8.2f} {s['error_rate']:6.1%} {s['empty_rate']:6.1%} {s['fallback_rate']:9.1%} "
+          f"{fmt(s['peak_rss_mb'], '9.0f')} {fmt(s['peak_chrome'], '7d')}", flush=True)
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test /compare against local stub stores.")
+    ap.add_argument("--levels", default="1,2,4,8", help="comma-separated concurrency steps")
+    ap.add_argument("--duration", type=float, default=30, help="seconds per step")
+    ap.add_argument("--latency", type=float, default=0.2, help="mean stub response latency (s)")
+    ap.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub responses that are 503s")
+    ap.add_argument("--cards", type=int, default=40, help="product cards per stub page")
+    ap.add_argument("--pad-kb", type=int, default=0, help="extra KB appended to each stub page")
+    ap.add_argument("--repeat", dest="unique", action="store_false", help="reuse product names and keep pre-crawling on (lets the cache answer)")
+    ap.add_argument("--browser-workers", type=int, default=0, help="shared browsers in the app (0 = Chrome per scrape)")
+    ap.add_argument("--parse-workers", type=int, default=0, help="HTML parsing processes in the app (0 = parse inline)")
+    ap.add_argument("--timeout", type=float, default=120, help="per-request client timeout (s)")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--json", help="also write the step results to this file")
+    ap.add_argument("--verbose", action="store_true", help="show the app's stderr")
+    args = ap.parse_args()
+
+    if psutil is None:
+        print("psutil not installed: RSS and Chrome counts will not be reported", file=sys.stderr)
+    app = start_app(args, start_stubs(args))
+    args.app_pid = app.pid
+    steps = []
+    counter = [0]
+    try:
+        print("  conc   reqs     p50     p95     p99    req/s  errors  empty  fallback   rss(MB)  chrome")
+        for level in [int(x) for x in args.levels.split(",")]:
+            steps.append(run_step(args, level, counter))
+            print_row(steps[-1])
+    finally:
+        app.terminate()
+        app.wait()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(steps, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# parsepool.py
+# Process pool for CPU-bound HTML parsing. BeautifulSoup holds the GIL, so
+# parsing inside Flask request threads serializes concurrent /compare calls.
+# Pages are handed to workers through shared memory (not pickled) and only the
+# small (title, price, url) record comes back.
+import os, time, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+def attach(name):
+    try:
+        # the parent owns and unlinks the segment; keep the worker's tracker out of it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def run_parser(func, shm_name, size, product, submitted):
+    started = time.time()
+    shm = attach(shm_name)
+    try:
+        with shm.buf[:size] as view:
+            html = str(view, "utf-8", "replace")
+    finally:
+        shm.close()
+    return func(html, product), started - submitted
+
+class QueueFull(RuntimeError):
+    pass
+
+class ParsePool:
+    def __init__(self, workers=None, queue_depth=32, timeout=30):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.timeout = timeout  # seconds a caller waits for its parse before giving up
+        self.executor = self.new_executor()
+        # at most workers + queue_depth pages held in shared memory at once
+        self.slots = threading.BoundedSemaphore(self.workers + queue_depth)
+        self.lock = threading.Lock()
+        self.jobs = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rebuilds = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def new_executor(self):
+        # spawn, not fork: the pool is started from threaded request handlers
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def rebuild(self, broken):
+        """Replace a broken executor (once, however many callers noticed)."""
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.executor = self.new_executor()
+            self.rebuilds += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, func, shm, size, product, submitted):
+        for attempt in (1, 2):
+            executor = self.executor
+            try:
+                return executor.submit(run_parser, func, shm.name, size, product, submitted).result(timeout=self.timeout)
+            except BrokenProcessPool:
+                # a worker died (and took the executor with it); retry once on a fresh one
+                self.rebuild(executor)
+                if attempt == 2:
+                    raise
+            except TimeoutError:
+                with self.lock:
+                    self.timeouts += 1
+                raise
+
+    def parse(self, func, html, product):
+        """Run func(html, product) in a worker and return its result.
+
+        Raises QueueFull when workers + queue_depth pages are already waiting,
+        and TimeoutError if the parse takes longer than `timeout`.
+        """
+        submitted = time.time()
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise QueueFull(f"{self.workers + self.queue_depth} pages already queued for parsing")
+        shm = None
+        try:
+            data = html.encode("utf-8")
+            shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            shm.buf[:len(data)] = data
+            with self.lock:
+                self.in_flight += 1
+            try:
+                result, waited = self.run(func, shm, len(data), product, submitted)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            self.slots.release()
+        with self.lock:
+            self.jobs += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "jobs": self.jobs,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "rebuilds": self.rebuilds,
+                "queue_wait_avg": round(self.wait_total / self.jobs, 4) if self.jobs else 0.0,
+                "queue_wait_max": round(self.wait_max, 4),
+            }
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,168 @@
+# precrawler.py
+# A handful of queries (think "iphone 15", "kurti") make up most /compare
+# traffic. PreCrawler counts how often each product is asked for and keeps the
+# top-K refreshed in the background, so those requests are answered from
+# cache instead of waiting on four live scrapes.
+import time, heapq, threading
+
+def normalize(product):
+    return " ".join(product.lower().split())
+
+class PreCrawler:
+    def __init__(self, fetch, stores, top_k=20, per_minute=24, refresh_after=600, max_age=900, half_life=3600, seed=(), policy=None, breakers=None):
+        self.fetch = fetch                  # fetch(store, product) -> result
+        self.stores = list(stores)
+        self.top_k = top_k
+        self.per_minute = per_minute        # crawl budget, in store fetches
+        self.refresh_after = refresh_after  # re-crawl hot products this often (s) ...
+        self.policy = policy                # ... unless a recrawl.RecrawlPolicy decides per store
+        self.breakers = breakers or {}      # store -> breaker.CircuitBreaker
+        self.grace = max_age - refresh_after  # serve cached results this long past their refresh
+        self.half_life = half_life          # popularity decay (s)
+        self.counts = {normalize(p): 1.0 for p in seed}
+        self.cache = {}                     # product -> {store: (fetched_at, result)}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_decay = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.crawls = 0
+
+    @property
+    def enabled(self):
+        # decay and eviction run on the crawl thread, so with it off nothing is kept
+        return bool(self.per_minute)
+
+    def record(self, product):
+        if not self.enabled:
+            return
+        key = normalize(product)
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0.0) + 1.0
+
+    def interval(self, key, store):
+        if self.policy:
+            return self.policy.interval(key, store)
+        return self.refresh_after
+
+    def get(self, product):
+        """Cached results for product if every store is fresh enough, else None.
+
+        A store whose circuit breaker is open can't be scraped anyway, so it is
+        answered from whatever we have for it instead of forcing a miss.
+        """
+        if not self.enabled:
+            return None
+        key = normalize(product)
+        now = time.time()
+        with self.lock:
+            entries = dict(self.cache.get(key, {}))
+        results = []
+        for s in self.stores:
+            entry = entries.get(s)
+            if entry and now - entry[0] <= self.interval(key, s) + self.grace:
+                results.append(entry[1])
+            elif s in self.breakers and self.breakers[s].is_open():
+                results.append(dict(entry[1], fallback=True) if entry else self.breakers[s].fallback(key))
+            else:
+                results = None
+                break
+        with self.lock:
+            if results is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return results
+
+    def put(self, product, results):
+        if not self.enabled:
+            return
+        key = normalize(product)
+        now = time.time()
+        # circuit-breaker fallbacks are old (or empty) data, not a fresh fetch, and
+        # a scrape whose page didn't load should be retried, not served for minutes
+        results = [r for r in results if not r.get("fallback") and not r.get("failed")]
+        with self.lock:
+            entries = self.cache.setdefault(key, {})
+            for r in results:
+                entries[r["store"]] = (now, r)
+        if self.policy:
+            for r in results:
+                self.policy.observe(key, r["store"], r["price"], now)
+
+    def decay(self, now):
+        factor = 0.5 ** ((now - self.last_decay) / self.half_life)
+        self.last_decay = now
+        for key in list(self.counts):
+            self.counts[key] *= factor
+            # forget one-off queries, but keep anything we still have cached
+            if self.counts[key] < 0.05 and key not in self.cache:
+                del self.counts[key]
+
+    def queue(self):
+        """Priority queue of (product, store) fetches: most overdue first, then most popular."""
+        now = time.time()
+        with self.lock:
+            self.decay(now)
+            hot = dict(heapq.nlargest(self.top_k, self.counts.items(), key=lambda kv: kv[1]))
+            # drop cached results that fell out of the top-K a while ago
+            for key in list(self.cache):
+                if key not in hot and all(now - t > self.refresh_after + self.grace for t, _ in self.cache[key].values()):
+                    del self.cache[key]
+            cached = {key: dict(self.cache.get(key, {})) for key in hot}
+        heap = []
+        for key, count in hot.items():
+            for store in self.stores:
+                entry = cached[key].get(store)
+                due = entry[0] + self.interval(key, store) if entry else 0.0
+                if store in self.breakers:
+                    # don't spend the budget on a store that would short-circuit;
+                    # it comes due again when its breaker wants a probe
+                    due = max(due, self.breakers[store].retry_at())
+                heapq.heappush(heap, (due, -count, key, store))
+        return heap
+
+    def crawl_next(self):
+        """Refresh the most overdue (product, store), if any is due. Returns it or None."""
+        heap = self.queue()
+        if not heap or heap[0][0] > time.time():
+            return None
+        _, _, key, store = heapq.heappop(heap)
+        result = self.fetch(store, key)
+        self.put(key, [result])
+        if result.get("fallback"):
+            return None
+        with self.lock:
+            self.crawls += 1
+        return key, store
+
+    def run(self):
+        interval = 60.0 / self.per_minute
+        while True:
+            started = time.time()
+            try:
+                self.crawl_next()
+            except Exception:
+                pass
+            time.sleep(max(0.0, interval - (time.time() - started)))
+
+    def start(self):
+        with self.lock:
+            if self.thread or not self.enabled:
+                return
+            self.thread = threading.Thread(target=self.run, name="precrawler", daemon=True)
+            self.thread.start()
+
+    def stats(self):
+        with self.lock:
+            top = heapq.nlargest(self.top_k, self.counts.items(), key=lambda kv: kv[1])
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "crawls": self.crawls,
+                "cached": len(self.cache),
+                "top": [[key, round(count, 2)] for key, count in top],
+            }
+        if self.policy:
+            stats["recrawl"] = self.policy.stats()
+        return stats
@@ -0,0 +1,67 @@
+# recrawl.py
+# Most listings keep the same price for days while flash-sale items move
+# hourly, so a fixed recrawl interval wastes the scrape budget on the former
+# and serves stale prices for the latter. RecrawlPolicy models price changes of
+# each (product, store) as a Poisson process, estimates its rate from what we
+# observed, and picks the longest interval that keeps the chance of serving a
+# changed price under `target`.
+import math, threading
+
+class RecrawlPolicy:
+    def __init__(self, target=0.1, fixed_interval=600, min_interval=300, max_interval=6 * 3600, prior_changes=1.0, prior_time=None):
+        self.target = target                  # acceptable P(price changed since last fetch)
+        self.fixed_interval = fixed_interval  # what we would recrawl at otherwise (for stats)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # until we have history, assume prior_changes per prior_time seconds; by
+        # default that rate schedules a new pair exactly at fixed_interval
+        self.prior_changes = prior_changes
+        self.prior_time = prior_time or prior_changes * fixed_interval / -math.log(1.0 - target)
+        self.history = {}                     # (product, store) -> dict
+        self.lock = threading.Lock()
+
+    def observe(self, product, store, price, t):
+        """Record a fetch of (product, store) at time t that returned price.
+
+        price is None when the page loaded but the store doesn't sell the
+        product; that is an observation like any other (failed scrapes are
+        never passed in), so "not sold" pairs back off too.
+        """
+        key = (product, store)
+        with self.lock:
+            h = self.history.get(key)
+            if h is None:
+                self.history[key] = {"price": price, "since": t, "last": t, "changes": 0, "fetches": 1}
+                return
+            h["fetches"] += 1
+            if price != h["price"]:
+                h["changes"] += 1
+                h["price"] = price
+            h["last"] = t
+
+    def rate(self, product, store):
+        """Estimated price changes per second."""
+        with self.lock:
+            h = self.history.get((product, store))
+            changes = h["changes"] if h else 0
+            span = h["last"] - h["since"] if h else 0.0
+        return (changes + self.prior_changes) / (span + self.prior_time)
+
+    def interval(self, product, store):
+        """Seconds until the next fetch: P(change) = 1 - exp(-rate * interval) <= target."""
+        seconds = -math.log(1.0 - self.target) / self.rate(product, store)
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    def stats(self):
+        with self.lock:
+            fetches = 0
+            fixed = 0
+            for h in self.history.values():
+                fetches += h["fetches"]
+                fixed += int((h["last"] - h["since"]) / self.fixed_interval) + 1
+            return {
+                "tracked": len(self.history),
+                "fetches": fetches,
+                "fixed_interval_fetches": fixed,
+                "fetches_saved": fixed - fetches,
+            }
@@ -0,0 +1,21 @@
+from breaker import CircuitBreaker
+
+def test_loaded_page_without_a_match_is_not_a_failure():
+    b = CircuitBreaker("Myntra", failures=2)
+    for _ in range(5):
+        b.call("iphone 15", lambda: {"store": "Myntra", "price": None, "loaded": True})
+    assert b.stats()["state"] == "closed"
+    result = b.call("iphone 15", lambda: {"store": "Myntra", "price": None, "loaded": True})
+    assert "loaded" not in result
+
+def test_empty_pages_open_the_breaker():
+    b = CircuitBreaker("Myntra", failures=2)
+    b.call("kurti", lambda: {"store": "Myntra", "price": None, "loaded": False})
+    b.call("kurti", lambda: {"store": "Myntra", "price": None})
+    assert b.is_open()
+
+def test_last_good_is_capped():
+    b = CircuitBreaker("Myntra", keep=3)
+    for i in range(10):
+        b.call(f"p{i}", lambda: {"store": "Myntra", "price": 100, "loaded": True})
+    assert list(b.last_good) == ["p7", "p8", "p9"]
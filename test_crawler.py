@@ -0,0 +1,52 @@
+import json
+from finalCrawler import ListingWatcher, myntra_blob_products
+
+def myntra_card(i, close=True):
+    return (f'<li class="product-base"><a href="/p/{i}"><h3 class="product-brand">Roadster</h3>'
+            f'<h4 class="product-product">Kurti {i}</h4><span class="product-discountedPrice">Rs. {500 + i}</span></a>'
+            + ("</li>" if close else ""))
+
+def meesho_card(i):
+    return f'<div class="sc-dkrFOg x"><div><a href="/p/{i}"><p>Kurti {i}</p><h5>₹{300 + i}</h5></a></div></div>'
+
+def feed(watcher, html, size):
+    """Feed html in chunks of size; return how much was read when the watcher was satisfied."""
+    for i in range(0, len(html), size):
+        watcher.feed(html[i:i + size])
+        if watcher.done:
+            return i + size
+    return len(html)
+
+def myntra_watcher(max_cards=3):
+    return ListingWatcher("li", ["product-base"], max_cards=max_cards, blob_marker="window.__myx")
+
+def test_myntra_cards_split_across_chunks():
+    html = "<html><body><ul>" + "".join(myntra_card(i) for i in range(10)) + "</ul></body></html>"
+    w = myntra_watcher()
+    read = feed(w, html, 7)
+    assert w.done and w.cards == 3
+    assert read < html.index(myntra_card(4))
+
+def test_meesho_nested_divs_split_across_chunks():
+    html = "<html><body>" + "".join(meesho_card(i) for i in range(10)) + "</body></html>"
+    w = ListingWatcher("div", ["Card__BaseCard", "sc-dkrFOg"], max_cards=4)
+    read = feed(w, html, 5)
+    assert w.done and w.cards == 4
+    assert read < html.index(meesho_card(5))
+    assert w.has_listing(html[:read])
+
+def test_unclosed_li_cards_are_counted():
+    html = "<ul>" + "".join(myntra_card(i, close=False) for i in range(5)) + "</ul>"
+    w = myntra_watcher(max_cards=5)
+    feed(w, html, 11)
+    assert w.cards == 5 and w.done
+
+def test_early_myntra_blob_stops_the_download():
+    blob = {"searchData": {"results": {"products": [
+        {"brand": "Roadster", "product": "Kurti", "price": 549, "landingPageUrl": "kurti/1"}]}}}
+    html = "<html><head><script>window.__myx = " + json.dumps(blob) + "</script></head><body>" + "x" * 5000
+    w = myntra_watcher()
+    read = feed(w, html, 9)
+    assert w.blob_done and w.cards == 0
+    assert read < 1000
+    assert myntra_blob_products(html[:read]) == [("Roadster Kurti", 549.0, "https://www.myntra.com/kurti/1")]
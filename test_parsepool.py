@@ -0,0 +1,32 @@
+import os
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from parsepool import ParsePool, QueueFull
+
+def count(html, product):
+    return (product, html.count("₹"))
+
+def crash(html, product):
+    os._exit(1)
+
+@pytest.fixture
+def pool():
+    p = ParsePool(workers=1, queue_depth=0, timeout=5)
+    yield p
+    p.close()
+
+def test_parse_round_trip(pool):
+    assert pool.parse(count, "₹1 ₹2", "kurti") == ("kurti", 2)
+
+def test_recovers_from_a_crashed_worker(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.parse(crash, "", "kurti")
+    assert pool.parse(count, "₹1", "kurti") == ("kurti", 1)
+    assert pool.stats()["rebuilds"] >= 1
+
+def test_rejects_when_the_queue_is_full(pool):
+    pool.slots.acquire()
+    with pytest.raises(QueueFull):
+        pool.parse(count, "", "kurti")
+    pool.slots.release()
+    assert pool.stats()["rejected"] == 1
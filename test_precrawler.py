@@ -0,0 +1,71 @@
+import time
+from breaker import CircuitBreaker
+from precrawler import PreCrawler
+
+STORES = ["A", "M"]
+
+def make(prices):
+    """PreCrawler over stores A and M whose fetches go through real breakers."""
+    breakers = {s: CircuitBreaker(s, failures=1, reset_after=60) for s in STORES}
+    fetched = []
+
+    def fetch(store, product):
+        def scrape():
+            fetched.append((product, store))
+            return {"store": store, "price": prices[store]}
+        return breakers[store].call(product, scrape)
+
+    pc = PreCrawler(fetch, STORES, top_k=2, refresh_after=600, seed=["kurti", "saree"], breakers=breakers)
+    return pc, breakers, fetched
+
+def test_open_breaker_does_not_eat_the_crawl_budget():
+    prices = {"A": 100, "M": None}
+    pc, breakers, fetched = make(prices)
+    pc.crawl_next()
+    pc.crawl_next()
+    assert breakers["M"].is_open()
+    # make every A entry due again
+    for entries in pc.cache.values():
+        entries["A"] = (time.time() - 3600, entries["A"][1])
+    for _ in range(10):
+        pc.crawl_next()
+    m_fetches = [f for f in fetched if f[1] == "M"]
+    assert len(m_fetches) == 1
+    assert ("kurti", "A") in fetched[2:] and ("saree", "A") in fetched[2:]
+    assert pc.stats()["crawls"] == len(fetched)
+
+def test_get_serves_cache_while_a_breaker_is_open():
+    prices = {"A": 100, "M": 50}
+    pc, breakers, _ = make(prices)
+    pc.put("kurti", [{"store": "A", "price": 100}])
+    assert pc.get("kurti") is None
+    breakers["M"].call("kurti", lambda: {"store": "M", "price": 50})
+    breakers["M"].call("kurti", lambda: {"store": "M", "price": None})
+    results = pc.get("kurti")
+    assert results[0] == {"store": "A", "price": 100}
+    assert results[1]["price"] == 50 and results[1]["fallback"]
+
+def test_disabled_precrawler_keeps_nothing():
+    pc = PreCrawler(lambda store, product: None, STORES, per_minute=0)
+    pc.record("kurti")
+    pc.put("kurti", [{"store": "A", "price": 100}, {"store": "M", "price": 50}])
+    assert pc.get("kurti") is None
+    assert pc.counts == {} and pc.cache == {}
+
+def test_failed_scrape_is_not_cached():
+    breakers = {s: CircuitBreaker(s, failures=3) for s in STORES}
+    page = {"A": True, "M": False}
+
+    def fetch(store, product):
+        loaded = page[store]
+        return breakers[store].call(product, lambda: {"store": store, "price": 100 if loaded else None, "loaded": loaded})
+
+    pc = PreCrawler(fetch, STORES, breakers=breakers)
+    results = [fetch(s, "kurti") for s in STORES]
+    assert results[1]["failed"] and "loaded" not in results[1]
+    pc.put("kurti", results)
+    # M recovers: the next request must scrape it again rather than hit the cache
+    assert pc.get("kurti") is None
+    page["M"] = True
+    pc.put("kurti", [fetch("M", "kurti")])
+    assert [r["price"] for r in pc.get("kurti")] == [100, 100]
@@ -0,0 +1,28 @@
+import pytest
+from recrawl import RecrawlPolicy
+
+def test_new_pair_is_scheduled_at_the_fixed_interval():
+    p = RecrawlPolicy(target=0.1, fixed_interval=600)
+    assert p.interval("kurti", "Myntra") == pytest.approx(600)
+
+def test_stable_price_backs_off_to_max_interval():
+    p = RecrawlPolicy(fixed_interval=600, max_interval=6 * 3600)
+    for hour in range(7 * 24):
+        p.observe("kurti", "Myntra", 499, hour * 3600)
+    assert p.interval("kurti", "Myntra") == 6 * 3600
+
+def test_volatile_price_moves_toward_min_interval():
+    p = RecrawlPolicy(fixed_interval=600, min_interval=300)
+    for i in range(50):
+        p.observe("iphone 15", "Amazon", 60000 + i, i * 600)
+    assert p.interval("iphone 15", "Amazon") == 300
+
+def test_not_sold_counts_as_an_unchanged_observation():
+    p = RecrawlPolicy(fixed_interval=600)
+    for hour in range(48):
+        p.observe("iphone 15", "Myntra", None, hour * 3600)
+    assert p.interval("iphone 15", "Myntra") > 600
+    stats = p.stats()
+    assert stats["tracked"] == 1 and stats["fetches"] == 48
+    # 47 hours at a fixed 10 minutes is 283 fetches
+    assert stats["fixed_interval_fetches"] == 283 and stats["fetches_saved"] == 235